@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import os
+import re
 import sys
+import errno
 import shutil
 import logging
 import argparse
@@ -8,8 +10,10 @@ import subprocess
 from colorlog import ColoredFormatter
 from pathlib import Path
 import inotify.adapters
+import inotify.constants
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration
 BOOT_USB = "/boot"  # Default Unraid USB mount point
@@ -17,12 +21,83 @@ BACKUP_DEST = "/mnt/remotes/local_backups/usb_backup" # Destination location
 EXCLUDED_PATHS = ['System Volume Information']
 
 # Global states
-sync_lock = threading.Lock()
 error_count = 0
-last_error_notification = 0
+last_error_notification = None  # monotonic time of the last notification sent
 notification_cooldown = 300  # 5 minutes between error notifications
 dry_run_mode = False
 
+# Event batching - inotify events are coalesced into time-bounded batches so a
+# burst (editor save-all, package extract) is applied in one pass instead of
+# one lock/makedirs/copy per event.
+batch_gap = 0.05   # flush after this much quiet time since the last event
+batch_max = 0.5    # ...but never hold a batch longer than this
+batch_cond = threading.Condition()
+pending_syncs = {}    # path -> op ("copy" | "mkdir"), deduped by path
+pending_deletes = {}  # path -> kind ("file" | "tree"), deduped by path
+_first_pending = 0.0  # time the oldest pending event arrived
+_last_pending = 0.0   # time the newest pending event arrived
+
+# Backpressure: if the destination stalls (SMB hiccup) while events pour in,
+# an unbounded backlog would only grow until the kernel queue overflows
+# anyway. Past the high-water mark we stop tracking individual events and
+# fall back to one full resync once the backlog drains.
+pending_high_water = 8000
+_resync_pending = False
+
+# (st_mtime_ns, st_size) of the source as of the last successful copy, so a
+# close-without-change (touch, editor no-op save) doesn't trigger a redundant
+# network copy. Nanosecond mtime avoids float-precision false matches.
+_index = {}
+
+# Destination directories known to exist, so the steady-state sync path
+# doesn't re-stat every ancestor with makedirs on each file event. Seeded by
+# initial_sync and kept current by the directory-create handler.
+_known_dirs = set()
+
+# Raise the kernel inotify queue limit to make overflow less likely during
+# large bursts (e.g. plugin updates extracting many files at once).
+inotify_max_queued_events = 65536
+overflow_count = 0
+
+# Only subscribe to the event types we handle. The default mask also delivers
+# IN_OPEN/IN_ACCESS/IN_CLOSE_NOWRITE etc., which dominate on a busy tree and
+# would cross the kernel boundary just to be dropped in Python.
+_WATCH_MASK = (inotify.constants.IN_CLOSE_WRITE |
+               inotify.constants.IN_MOVED_TO |
+               inotify.constants.IN_MOVED_FROM |
+               inotify.constants.IN_DELETE |
+               inotify.constants.IN_DELETE_SELF |
+               inotify.constants.IN_CREATE)
+
+class _OverflowAwareInotify(inotify.adapters.Inotify):
+    # The library drops any event whose watch descriptor has no registered
+    # path before it reaches event_gen, and kernel overflow events carry
+    # wd == -1, so IN_Q_OVERFLOW never reaches the consumer loop. Every event
+    # parsed from the stream does pass through _get_event_names before that
+    # filter, so latch the overflow there and let the loop poll the flag.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.overflowed = False
+
+    def _get_event_names(self, event_type):
+        if event_type & inotify.constants.IN_Q_OVERFLOW:
+            self.overflowed = True
+        return super()._get_event_names(event_type)
+
+class _OverflowAwareTree(inotify.adapters.InotifyTree):
+    # _BaseTree.__init__ hardcodes the Inotify class it instantiates, so this
+    # replicates its setup with the overflow-aware one.
+
+    def __init__(self, path, mask=inotify.constants.IN_ALL_EVENTS,
+                 block_duration_s=1):
+        self._mask = (mask |
+                      inotify.constants.IN_ISDIR |
+                      inotify.constants.IN_CREATE |
+                      inotify.constants.IN_DELETE)
+        self._i = _OverflowAwareInotify(block_duration_s=block_duration_s)
+        self._load_tree(path)
+
 # Setting up logging
 handler = logging.StreamHandler()
 handler.setFormatter(ColoredFormatter(
@@ -44,9 +119,10 @@ logger.propagate = False
 
 def notify_host(subject, message, icon="normal"):
     global last_error_notification
-    current_time = time.time()
+    current_time = time.monotonic()
 
-    if current_time - last_error_notification < notification_cooldown:
+    if (last_error_notification is not None and
+            current_time - last_error_notification < notification_cooldown):
         logger.debug("Notification cooldown active, skipping notification.")
         return
 
@@ -69,24 +145,74 @@ def notify_host(subject, message, icon="normal"):
         logger.warning("Unraid notify script not found")
 
 
+# Filesystems that don't count as a "real" mount for our purposes
+_PSEUDO_FSTYPES = frozenset(['rootfs', 'tmpfs', 'devtmpfs', 'efivars', 'overlay'])
+
+# Cached (timestamp, {mountpoint: fstype}) parse of /proc/self/mountinfo, so
+# the back-to-back checks inside check_paths don't re-read the file.
+_mounts_cache = (0.0, None)
+mount_cache_ttl = 30  # half of path_check_interval
+
+def _unescape_mount_path(path):
+    # mountinfo octal-escapes spaces and other specials (e.g. "\040")
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), path)
+
+def _mount_table():
+    global _mounts_cache
+
+    now = time.monotonic()
+    ts, mounts = _mounts_cache
+    if mounts is not None and now - ts < mount_cache_ttl:
+        return mounts
+
+    mounts = {}
+    with open("/proc/self/mountinfo") as f:
+        for line in f:
+            fields = line.split()
+            try:
+                # The fstype sits right after the optional-fields separator
+                sep = fields.index("-")
+            except ValueError:
+                continue
+            mounts[_unescape_mount_path(fields[4])] = fields[sep + 1]
+
+    _mounts_cache = (now, mounts)
+    return mounts
+
 def is_mounted(path):
     path = os.path.normpath(path)
-    # Use df -T to return the filesystem type
-    try:
-        result = subprocess.run(['df', '-T'], stdout=subprocess.PIPE, text=True)
-        df_output = result.stdout.splitlines()
-
-        for line in df_output[1:]:
-            parts = line.split()
-            fstype = parts[1]
-            if fstype not in ['rootfs', 'tmpfs', 'devtmpfs', 'efivars', 'overlay']:
-                return True
 
+    try:
+        mounts = _mount_table()
     except Exception as e:
         logger.critical(f"Error while checking mount status: {e}")
         return False
-    
-    return False
+
+    # Find the mount the path lives on and check it isn't a pseudo fs. The
+    # path itself need not be a mount point (the backup dir sits inside the
+    # remote share's mount).
+    probe = path
+    while True:
+        fstype = mounts.get(probe)
+        if fstype is not None:
+            return fstype not in _PSEUDO_FSTYPES
+        parent = os.path.dirname(probe)
+        if parent == probe:
+            return False
+        probe = parent
+
+def raise_inotify_queue_limit():
+    limit_file = "/proc/sys/fs/inotify/max_queued_events"
+    try:
+        with open(limit_file) as f:
+            current = int(f.read().strip())
+
+        if current < inotify_max_queued_events:
+            with open(limit_file, "w") as f:
+                f.write(str(inotify_max_queued_events))
+            logger.info(f"Raised inotify max_queued_events from {current} to {inotify_max_queued_events}")
+    except Exception as e:
+        logger.warning(f"Could not raise inotify queue limit: {e}")
 
 def check_paths():
     if not is_mounted(BOOT_USB):
@@ -109,198 +235,607 @@ def check_paths():
     
     return True
 
+# Hashed so the hot-path check is one split plus an O(components) set probe,
+# matching whole path components only - a file merely containing an excluded
+# name as a substring is not skipped.
+_EXCLUDED_SET = frozenset(EXCLUDED_PATHS)
+
 def should_exclude(path):
-    for excluded in EXCLUDED_PATHS:
-        if excluded in path:
-            return True
-    return False
+    return not _EXCLUDED_SET.isdisjoint(path.split(os.sep))
+
+# Precomputed so the per-event path translation is one startswith + slice +
+# concat instead of os.path.relpath splitting and normalizing both paths.
+_BOOT_PREFIX = os.path.normpath(BOOT_USB).rstrip(os.sep) + os.sep
+_BOOT_PREFIX_LEN = len(_BOOT_PREFIX)
+_BACKUP_ROOT = os.path.normpath(BACKUP_DEST).rstrip(os.sep)
 
 def get_backup_path(primary_path):
+    if primary_path.startswith(_BOOT_PREFIX):
+        return _BACKUP_ROOT + os.sep + primary_path[_BOOT_PREFIX_LEN:]
+    # Paths from inotify and our own walks always carry the prefix verbatim;
+    # anything normalized differently takes the general route
     rel_path = os.path.relpath(primary_path, BOOT_USB)
     return os.path.join(BACKUP_DEST, rel_path)
 
-def sync_file(src):
-    if should_exclude(src):
-        return
-        
+def _copy_file(src, dst):
+    # Copy src to dst preserving mode and timestamps. os.copy_file_range lets
+    # the kernel move the bytes directly instead of shutil.copy2's user-space
+    # read/write loop, and we skip the xattr calls copy2 makes, which fail on
+    # the SMB/CIFS destinations under /mnt/remotes. Falls back to a buffered
+    # copy when the syscall is unavailable or refuses the filesystem pair.
+    try:
+        src_fd = os.open(src, os.O_RDONLY | os.O_NOATIME)
+    except PermissionError:
+        # O_NOATIME needs ownership of the file
+        src_fd = os.open(src, os.O_RDONLY)
+
+    try:
+        st = os.fstat(src_fd)
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            try:
+                while os.copy_file_range(src_fd, dst_fd, 1 << 24):
+                    pass
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL):
+                    raise
+                os.lseek(src_fd, 0, os.SEEK_SET)
+                os.lseek(dst_fd, 0, os.SEEK_SET)
+                os.ftruncate(dst_fd, 0)
+                with os.fdopen(src_fd, "rb", closefd=False) as fsrc, \
+                     os.fdopen(dst_fd, "wb", closefd=False) as fdst:
+                    shutil.copyfileobj(fsrc, fdst, 1 << 20)
+
+            try:
+                os.fchmod(dst_fd, st.st_mode & 0o7777)
+            except OSError:
+                pass  # mode bits are not meaningful on FAT/SMB anyway
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    # Preserve mtime so the next initial_sync sees the pair as in sync
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    _index[src] = (st.st_mtime_ns, st.st_size)
+    return st.st_size
+
+def _sync_one(src):
+    # Runs on the batch worker thread, the single writer to the
+    # destination at steady state. Returns bytes copied, or None on
+    # error/dry-run, so the batch flush can log one summary line.
     dst = get_backup_path(src)
-    
+
     try:
-        with sync_lock:
-            if dry_run_mode:
-                logger.info(f"- DRY RUN - Would sync: {os.path.relpath(src, BOOT_USB)}")
-            else:
-                os.makedirs(os.path.dirname(dst), exist_ok=True)
-                shutil.copy2(src, dst)
-                logger.info(f"Synced: {os.path.relpath(src, BOOT_USB)}")
+        if dry_run_mode:
+            logger.info(f"- DRY RUN - Would sync: {os.path.relpath(src, BOOT_USB)}")
+        else:
+            st = os.stat(src, follow_symlinks=False)
+            if _index.get(src) == (st.st_mtime_ns, st.st_size):
+                logger.debug(f"Unchanged, skipping: {os.path.relpath(src, BOOT_USB)}")
+                return None
+
+            dst_dir = os.path.dirname(dst)
+            if dst_dir not in _known_dirs:
+                os.makedirs(dst_dir, exist_ok=True)
+                _known_dirs.add(dst_dir)
+            size = _copy_file(src, dst)
+            logger.debug(f"Synced: {os.path.relpath(src, BOOT_USB)}")
+            return size
     except Exception as e:
         logger.error(f"Error syncing {src}: {e}")
         notify_host("USB Mirror Error - Sync failure", f"Failed to sync {os.path.relpath(src, BOOT_USB)}: {str(e)}", "alert")
+    return None
 
-def remove_file(primary_path):
+def _remove_one(primary_path):
+    # Runs on the batch worker thread. Returns the backup path when a
+    # backup file was actually removed, so the caller can collect parents to
+    # prune.
     backup_path = get_backup_path(primary_path)
-    
-    if should_exclude(backup_path):
-        return
-        
+    removed = None
+    _index.pop(primary_path, None)
+
     try:
-        with sync_lock:
-            if os.path.exists(backup_path):
-                if dry_run_mode:
-                    logger.info(f"- DRY RUN - Would remove: {os.path.relpath(backup_path, BACKUP_DEST)}")
-                else:
-                    os.remove(backup_path)
-                    logger.info(f"Removed: {os.path.relpath(backup_path, BACKUP_DEST)}")
-                
-                # Remove empty parent directories
-                if not dry_run_mode:
-                    parent = os.path.dirname(backup_path)
-                    while parent != BACKUP_DEST:
-                        try:
-                            if not os.listdir(parent):
-                                os.rmdir(parent)
-                                logger.debug(f"Removed empty directory: {parent}")
-                            else:
-                                break
-                        except:
-                            break
-                        parent = os.path.dirname(parent)
+        if os.path.exists(backup_path):
+            if dry_run_mode:
+                logger.info(f"- DRY RUN - Would remove: {os.path.relpath(backup_path, BACKUP_DEST)}")
+            else:
+                os.remove(backup_path)
+                removed = backup_path
+                logger.debug(f"Removed: {os.path.relpath(backup_path, BACKUP_DEST)}")
     except Exception as e:
         logger.error(f"Error removing {backup_path}: {e}")
         notify_host("USB Mirror Error - Deletion failure", f"Failed to remove {os.path.relpath(backup_path, BACKUP_DEST)}: {str(e)}", "alert")
+    return removed
 
-def remove_directory(primary_path):
-    backup_path = get_backup_path(primary_path)
-    
-    if should_exclude(backup_path):
+def _prune_empty_dirs(candidates):
+    # Runs on the batch worker thread. Remove now-empty parents of deleted files,
+    # deepest first so an emptied chain collapses with one scandir per
+    # directory per batch - instead of re-listing the same parent after every
+    # single deletion.
+    queue = sorted(candidates, key=len, reverse=True)
+    pending = set(queue)
+    i = 0
+    while i < len(queue):
+        directory = queue[i]
+        i += 1
+        pending.discard(directory)
+
+        if not directory.startswith(BACKUP_DEST + os.sep):
+            continue
+
+        try:
+            with os.scandir(directory) as it:
+                if next(it, None) is not None:
+                    continue
+            os.rmdir(directory)
+        except OSError:
+            continue
+
+        _known_dirs.discard(directory)
+        logger.debug(f"Removed empty directory: {directory}")
+
+        parent = os.path.dirname(directory)
+        if parent not in pending:
+            queue.append(parent)
+            pending.add(parent)
+
+def _accepting_events():
+    # Called with batch_cond held. Flips into resync mode once the backlog
+    # passes the high-water mark; individual events are dropped from then on
+    # because the coming full resync covers them anyway.
+    global _resync_pending
+
+    if _resync_pending:
+        return False
+    if len(pending_syncs) + len(pending_deletes) >= pending_high_water:
+        _resync_pending = True
+        logger.warning(f"Pending backlog passed {pending_high_water} entries; deferring to a full resync")
+        batch_cond.notify()
+        return False
+    return True
+
+def queue_sync(src):
+    global _first_pending, _last_pending
+
+    if should_exclude(src):
         return
-        
+
+    with batch_cond:
+        if not _accepting_events():
+            return
+        if not pending_syncs and not pending_deletes:
+            _first_pending = time.monotonic()
+        _last_pending = time.monotonic()
+        pending_syncs[src] = "copy"
+        # A re-created file supersedes a pending file delete (the copy
+        # overwrites anyway). A pending tree delete must stay queued: deletes
+        # flush before copies, so the stale backup directory is cleared first.
+        if pending_deletes.get(src) == "file":
+            del pending_deletes[src]
+        batch_cond.notify()
+
+def queue_delete(primary_path, kind="file"):
+    global _first_pending, _last_pending
+
+    if should_exclude(get_backup_path(primary_path)):
+        return
+
+    with batch_cond:
+        if not _accepting_events():
+            return
+        if not pending_syncs and not pending_deletes:
+            _first_pending = time.monotonic()
+        _last_pending = time.monotonic()
+        # A deleted path supersedes any pending copy/mkdir for it
+        pending_syncs.pop(primary_path, None)
+        pending_deletes[primary_path] = kind
+        batch_cond.notify()
+
+def queue_mkdir(primary_path):
+    global _first_pending, _last_pending
+
+    if should_exclude(primary_path):
+        return
+
+    with batch_cond:
+        if not _accepting_events():
+            return
+        if not pending_syncs and not pending_deletes:
+            _first_pending = time.monotonic()
+        _last_pending = time.monotonic()
+        pending_syncs[primary_path] = "mkdir"
+        # Any pending delete for the path stays queued: deletes flush before
+        # copies, so a tree delete clears stale children and a file delete
+        # clears a same-named file before the directory is recreated.
+        batch_cond.notify()
+
+def queue_subtree(primary_path):
+    # Enqueue a whole directory tree. Used for directories moved into the
+    # watch, whose existing contents predate the watch and so never generate
+    # their own events.
+    if should_exclude(primary_path):
+        return
+
+    queue_mkdir(primary_path)
     try:
-        with sync_lock:
-            if os.path.exists(backup_path):
-                if dry_run_mode:
-                    logger.info(f"- DRY RUN - Would remove directory: {os.path.relpath(backup_path, BACKUP_DEST)}")
-                else:
-                    shutil.rmtree(backup_path)
-                    logger.info(f"Removed directory: {os.path.relpath(backup_path, BACKUP_DEST)}")
+        for entry, full_path in _scan(primary_path):
+            if entry.is_dir(follow_symlinks=False):
+                queue_mkdir(full_path)
+            else:
+                queue_sync(full_path)
+    except OSError as e:
+        logger.error(f"Error scanning {primary_path}: {e}")
+
+def flush_batch(copies, deletes):
+    # Runs on the batch worker thread; being the sole writer serializes all
+    # destination mutations without any per-operation locking.
+    n_copied = n_removed = bytes_copied = 0
+
+    candidate_parents = set()
+    for path, kind in deletes:
+        if kind == "tree":
+            if _remove_tree_one(path):
+                n_removed += 1
+        else:
+            removed = _remove_one(path)
+            if removed:
+                n_removed += 1
+                candidate_parents.add(os.path.dirname(removed))
+    for path, op in copies:
+        if op == "mkdir":
+            _mkdir_one(path)
+        else:
+            size = _sync_one(path)
+            if size is not None:
+                n_copied += 1
+                bytes_copied += size
+    if candidate_parents and not dry_run_mode:
+        _prune_empty_dirs(candidate_parents)
+
+    # One summary line per batch instead of one formatted write per file,
+    # which can stall the copier when a burst hits a slow TTY
+    if n_copied or n_removed:
+        logger.info(f"Synced {n_copied} file(s) ({bytes_copied} bytes), removed {n_removed}")
+
+def batch_worker():
+    global _resync_pending
+
+    while True:
+        run_resync = False
+
+        with batch_cond:
+            while not pending_syncs and not pending_deletes and not _resync_pending:
+                batch_cond.wait()
+
+            if not pending_syncs and not pending_deletes:
+                # Backlog drained while in resync mode; clear the flag before
+                # resyncing so events arriving during the resync are tracked
+                # again (the walk covers anything dropped before now).
+                _resync_pending = False
+                run_resync = True
+            else:
+                # Wait for the burst to settle (batch_gap of quiet) or for
+                # the batch to reach its maximum age, whichever comes first.
+                while True:
+                    now = time.monotonic()
+                    deadline = min(_last_pending + batch_gap, _first_pending + batch_max)
+                    if now >= deadline:
+                        break
+                    batch_cond.wait(deadline - now)
+
+                copies = list(pending_syncs.items())
+                deletes = list(pending_deletes.items())
+                pending_syncs.clear()
+                pending_deletes.clear()
+
+        # The worker is a daemon thread: an uncaught exception here would
+        # kill it silently and the mirror would stop syncing while the
+        # inotify loop kept enqueueing. Log and notify instead, then keep
+        # serving batches.
+        try:
+            if run_resync:
+                logger.warning("Recovering from event backlog with a full resync")
+                initial_sync()
+            else:
+                flush_batch(copies, deletes)
+        except Exception as e:
+            logger.error(f"Sync worker error: {e}")
+            notify_host(
+                "USB Mirror Error - Sync worker failure",
+                f"Background sync worker hit an unexpected error: {str(e)}",
+                "alert"
+            )
+
+def _mkdir_one(primary_path):
+    # Runs on the batch worker thread
+    backup_path = get_backup_path(primary_path)
+
+    try:
+        if dry_run_mode:
+            logger.debug(f"- DRY RUN - Would create directory: {os.path.relpath(backup_path, BACKUP_DEST)}")
+        else:
+            os.makedirs(backup_path, exist_ok=True)
+            _known_dirs.add(backup_path)
+            logger.debug(f"Created directory: {os.path.relpath(backup_path, BACKUP_DEST)}")
+    except Exception as e:
+        logger.error(f"Error creating directory {backup_path}: {e}")
+
+def _remove_tree_one(primary_path):
+    # Runs on the batch worker thread. Returns True when a backup directory
+    # was actually removed.
+    backup_path = get_backup_path(primary_path)
+    removed = False
+
+    try:
+        if os.path.exists(backup_path):
+            if dry_run_mode:
+                logger.info(f"- DRY RUN - Would remove directory: {os.path.relpath(backup_path, BACKUP_DEST)}")
+            else:
+                shutil.rmtree(backup_path)
+                removed = True
+                src_prefix = primary_path + os.sep
+                for key in [k for k in _index if k.startswith(src_prefix)]:
+                    del _index[key]
+                prefix = backup_path + os.sep
+                _known_dirs.difference_update(
+                    {d for d in _known_dirs if d == backup_path or d.startswith(prefix)})
+                logger.debug(f"Removed directory: {os.path.relpath(backup_path, BACKUP_DEST)}")
     except Exception as e:
         logger.error(f"Error removing directory {backup_path}: {e}")
         notify_host("USB Mirror Error - Deletion failure", f"Failed to remove {os.path.relpath(backup_path, BACKUP_DEST)}: {str(e)}", "alert")
+    return removed
+
+def _rsync_initial_sync():
+    # One rsync pass replaces the per-file Python stat/copy loops: it
+    # pipelines compare/copy/delete in C and removes orphans in the same run.
+    cmd = ["rsync", "-a", "--delete", "--itemize-changes"]
+    if dry_run_mode:
+        cmd.append("--dry-run")
+    cmd += [f"--exclude={p}" for p in EXCLUDED_PATHS]
+    cmd += [BOOT_USB + "/", BACKUP_DEST + "/"]
+
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True)
 
-def initial_sync():
-    logger.info("Performing initial sync...")   
     changes = 0
-    
-    # Sync all files from primary to backup
-    for root, dirs, files in os.walk(BOOT_USB):
-        # Filter out excluded directories
-        dirs[:] = [d for d in dirs if not should_exclude(os.path.join(root, d))]
-        
-        for file in files:
-            primary_path = os.path.join(root, file)
-            backup_path = get_backup_path(primary_path)
-            
-            if should_exclude(primary_path):
-                continue
-            
-            # Check if sync is needed
-            needs_sync = False
-            
-            if not os.path.exists(backup_path):
-                needs_sync = True
+    for line in result.stdout.splitlines():
+        # Itemized lines look like ">f.st...... config/go" or "*deleting   old/file"
+        if not line:
+            continue
+        changes += 1
+        itemized, _, rel_path = line.partition(" ")
+        if dry_run_mode:
+            logger.info(f"- DRY RUN - Would sync: {rel_path.strip()}")
+        elif itemized.startswith("*deleting"):
+            logger.debug(f"Removed orphaned: {rel_path.strip()}")
+        else:
+            logger.debug(f"Synced: {rel_path.strip()}")
+
+    return changes
+
+def _scan(parent):
+    # Recursively yield (entry, full_path) for every non-excluded entry under
+    # parent, directories included. Driving the walk with scandir directly
+    # lets us reuse the DirEntry's cached stat instead of issuing a second
+    # os.stat per file.
+    parent_slash = parent if parent.endswith(os.sep) else parent + os.sep
+    try:
+        with os.scandir(parent) as it:
+            entries = list(it)
+    except OSError as e:
+        # Directory vanished or became unreadable mid-walk; skip it like
+        # os.walk would rather than aborting the whole sync
+        logger.debug(f"Skipping unreadable directory {parent}: {e}")
+        return
+    for entry in entries:
+        full_path = parent_slash + entry.name
+        if should_exclude(full_path):
+            continue
+        yield entry, full_path
+        if entry.is_dir(follow_symlinks=False):
+            yield from _scan(full_path)
+
+small_file_max = 1 << 20   # files below this are copied by the thread pool
+initial_sync_workers = 8
+
+def _copy_one(src, dst):
+    # Lock-free per-file copy for initial_sync; destination directories are
+    # pre-created and source paths are disjoint, so no locking is needed.
+    try:
+        _copy_file(src, dst)
+        logger.debug(f"Synced: {os.path.relpath(src, BOOT_USB)}")
+    except Exception as e:
+        logger.error(f"Error syncing {src}: {e}")
+        notify_host("USB Mirror Error - Sync failure", f"Failed to sync {os.path.relpath(src, BOOT_USB)}: {str(e)}", "alert")
+
+def _iter_sync_work(primary_rel=None):
+    # Producer for the initial sync: walks the boot drive and yields
+    # (src, dst, size) for each file that needs copying, so the consumer can
+    # start uploading while the (slow) USB stick is still being enumerated.
+    # _scan yields a directory before its contents, so creating directories
+    # here as they are first seen keeps the makedirs-once guarantee. Every
+    # directory is mirrored, not just those with changed files, so the
+    # steady-state known-dirs cache starts complete. When primary_rel is
+    # given, every file's relative path is recorded there so the orphan pass
+    # can diff in memory.
+    for entry, primary_path in _scan(BOOT_USB):
+        backup_path = get_backup_path(primary_path)
+
+        if entry.is_dir(follow_symlinks=False):
+            if not dry_run_mode and backup_path not in _known_dirs:
+                os.makedirs(backup_path, exist_ok=True)
+                _known_dirs.add(backup_path)
+            continue
+
+        if primary_rel is not None:
+            primary_rel.add(os.path.relpath(primary_path, BOOT_USB))
+
+        try:
+            primary_stat = entry.stat(follow_symlinks=False)
+        except OSError as e:
+            logger.error(f"Error reading {primary_path}: {e}")
+            continue
+
+        # Check if sync is needed. FAT mtimes have 2-second granularity and
+        # CIFS round-trips can truncate, so exact float equality re-copied
+        # everything on every restart; compare nanoseconds with a 2 s window.
+        try:
+            backup_stat = os.stat(backup_path, follow_symlinks=False)
+            needs_sync = (abs(primary_stat.st_mtime_ns - backup_stat.st_mtime_ns) > 2_000_000_000 or
+                          primary_stat.st_size != backup_stat.st_size)
+        except OSError:
+            # Backup missing - copy it
+            needs_sync = True
+
+        if needs_sync:
+            yield primary_path, backup_path, primary_stat.st_size
+        else:
+            # Already in sync - seed the skip index with what we just statted
+            _index[primary_path] = (primary_stat.st_mtime_ns, primary_stat.st_size)
+
+def _python_initial_sync():
+    changes = 0
+    primary_rel = set()
+
+    # Drain the producer as it walks: small files go to a pool to overlap
+    # per-file round-trips to the remote share; large files are copied inline
+    # since a single kernel-mediated copy already saturates the link.
+    with ThreadPoolExecutor(max_workers=initial_sync_workers) as pool:
+        futures = []
+        for src, dst, size in _iter_sync_work(primary_rel):
+            changes += 1
+            if dry_run_mode:
+                logger.info(f"- DRY RUN - Would sync: {os.path.relpath(src, BOOT_USB)}")
+            elif size < small_file_max:
+                futures.append(pool.submit(_copy_one, src, dst))
             else:
-                try:
-                    primary_stat = os.stat(primary_path)
-                    backup_stat = os.stat(backup_path)
-                    
-                    if (primary_stat.st_mtime != backup_stat.st_mtime or 
-                        primary_stat.st_size != backup_stat.st_size):
-                        needs_sync = True
-                except:
-                    needs_sync = True
-            
-            if needs_sync:
-                sync_file(primary_path)
-                changes += 1
+                _copy_one(src, dst)
+        for future in futures:
+            future.result()
     
-    # Remove files from backup that don't exist in primary
+    # Remove files from backup that don't exist in primary, diffing against
+    # the set collected during the first walk - no stat on the primary side.
+    # fwalk hands us an open fd per directory, so each unlink resolves a
+    # single name in an already-open directory instead of re-walking the
+    # whole path.
     if not dry_run_mode:
-        for root, dirs, files in os.walk(BACKUP_DEST):
+        for root, dirs, files, rootfd in os.fwalk(BACKUP_DEST):
             for file in files:
                 backup_path = os.path.join(root, file)
                 rel_path = os.path.relpath(backup_path, BACKUP_DEST)
-                primary_path = os.path.join(BOOT_USB, rel_path)
-                
-                if not os.path.exists(primary_path):
+
+                if rel_path not in primary_rel:
                     try:
-                        os.remove(backup_path)
-                        logger.info(f"Removed orphaned file: {rel_path}")
+                        os.remove(file, dir_fd=rootfd)
+                        logger.debug(f"Removed orphaned file: {rel_path}")
                         changes += 1
                     except Exception as e:
                         logger.error(f"Error removing {backup_path}: {e}")
-    
+
+    return changes
+
+def initial_sync():
+    logger.info("Performing initial sync...")
+
+    try:
+        changes = _rsync_initial_sync()
+    except FileNotFoundError:
+        logger.debug("rsync not found, falling back to Python sync")
+        changes = _python_initial_sync()
+    except subprocess.CalledProcessError as e:
+        logger.error(f"rsync failed (exit {e.returncode}), falling back to Python sync")
+        changes = _python_initial_sync()
+
     logger.info(f"Initial sync completed: {changes} changes made")
 
 def start_monitoring():
+    global overflow_count, _resync_pending
+
     if not check_paths():
         sys.exit(1)
-    
+
+    raise_inotify_queue_limit()
+
     # Perform initial sync
     initial_sync()
     
     logger.info(f"Starting inotify monitoring of {BOOT_USB}")
-    
+
     # Create inotify instance
-    i = inotify.adapters.InotifyTree(BOOT_USB)
+    i = _OverflowAwareTree(BOOT_USB, mask=_WATCH_MASK)
+
+    # Worker that drains the coalesced event batches
+    worker = threading.Thread(target=batch_worker, daemon=True)
+    worker.start()
     
     # Throttle path checks
-    last_path_check = time.time()
+    last_path_check = time.monotonic()
     path_check_interval = 60  # Check every 60 seconds
     
     try:
         for event in i.event_gen(yield_nones=False):
             # Periodic path validation
-            current_time = time.time()
+            current_time = time.monotonic()
             if current_time - last_path_check >= path_check_interval:
                 if not check_paths():
                     sys.exit(1)
                 last_path_check = current_time
             
-            (_, type_names, path, filename) = event
-            
+            (header, _, path, filename) = event
+            mask = header.mask
+
+            # The kernel dropped events; the mirror may have diverged, so
+            # hand the batch worker a full resync rather than carrying on
+            # blind (it is the only thread allowed to write the destination).
+            if i.inotify.overflowed:
+                i.inotify.overflowed = False
+                overflow_count += 1
+                logger.warning(f"inotify queue overflow (#{overflow_count}), events were lost - scheduling full resync")
+                notify_host(
+                    "USB Mirror - inotify overflow",
+                    f"Kernel event queue overflowed ({overflow_count} time(s) since start); "
+                    "a full resync was scheduled to recover.",
+                    "warning"
+                )
+                with batch_cond:
+                    _resync_pending = True
+                    batch_cond.notify()
+
             full_path = os.path.join(path, filename)
             
             if should_exclude(full_path):
                 continue
                 
+            is_dir = mask & inotify.constants.IN_ISDIR
+
             # File created or modified
-            if 'IN_CLOSE_WRITE' in type_names or 'IN_MOVED_TO' in type_names:
-                if os.path.isfile(full_path):
+            if mask & (inotify.constants.IN_CLOSE_WRITE | inotify.constants.IN_MOVED_TO):
+                # IN_ISDIR tells us the target kind; no need to stat it
+                if not is_dir:
                     logger.debug(f"Detected change: {filename}")
-                    sync_file(full_path)
-
-            # File deleted
-            elif 'IN_DELETE' in type_names or 'IN_MOVED_FROM' in type_names:
-                logger.debug(f"Detected deletion: {filename}")
-                remove_file(full_path)
+                    queue_sync(full_path)
+                elif mask & inotify.constants.IN_MOVED_TO:
+                    # A directory moved into the tree arrives as one event;
+                    # its contents never fire events of their own
+                    logger.debug(f"Detected moved-in directory: {filename}")
+                    queue_subtree(full_path)
 
-            # Directory deleted
-            elif 'IN_DELETE_SELF' in type_names or 'IN_MOVED_FROM' in type_names:
-                if not os.path.exists(full_path):
+            # File or directory deleted / moved away
+            elif mask & (inotify.constants.IN_DELETE | inotify.constants.IN_MOVED_FROM):
+                if is_dir:
                     logger.debug(f"Detected directory deletion: {filename}")
-                    remove_directory(full_path)
-
-            # New directory created
-            elif 'IN_CREATE' in type_names and 'IN_ISDIR' in type_names:
-                backup_path = get_backup_path(full_path)
-                try:
-                    if dry_run_mode:
-                        logger.debug(f"- DRY RUN - Would create directory: {filename}")
-                    else:
-                        os.makedirs(backup_path, exist_ok=True)
-                        logger.debug(f"Created directory: {filename}")
-                except Exception as e:
-                    logger.error(f"Error creating directory {backup_path}: {e}")
+                    queue_delete(full_path, kind="tree")
+                else:
+                    logger.debug(f"Detected deletion: {filename}")
+                    queue_delete(full_path)
+
+            # New directory created. Files can land inside it before the
+            # recursive watch does (the library only adds the watch when this
+            # event is processed, and it has by now), so scan the subtree
+            # instead of just mirroring the directory itself.
+            elif mask & inotify.constants.IN_CREATE and is_dir:
+                logger.debug(f"Detected new directory: {filename}")
+                queue_subtree(full_path)
 
     except KeyboardInterrupt:
         logger.info("Monitoring stopped by user")